@@ -55,42 +55,39 @@ import sys
 import os
 import json
 import pygame
-from pygame import Surface
+from pygame import Rect, Surface
 from pathlib import Path
 from libs.utils import setup_logging
 from libs.utils import OsWindow, Color, Text, Xfm
-from libs.tile import Tile, TileMap, TileMapEncoder
+from libs import renderer
+from libs.tile import Tile, TileMap, TileMapEncoder, DIRECTIONS
 from libs.frect import FRect
 
 
+IDLE_AFTER_MS = 1000 # Editor goes idle if there are no events for this long
+IDLE_WAIT_MS = 500   # When idle, draw a frame at least this often
+
 def shutdown(filename:str) -> None:
     logger.info(f"Shutdown {filename}")
     pygame.font.quit()
     pygame.quit()
 
-class TextHud(Text):
-    def __init__(self, game) -> None:
-        self.game = game
-        super().__init__()
-        ### pygame.time.Clock.get_fps() -> float
-        self.msg += f"FPS: {self.game.clock.get_fps():0.1f}"
-        ### get_pos() -> (x, y)
-        mpos = pygame.mouse.get_pos()
-        self.msg += f"\nMouse: Render=({mpos[0]:4d},{mpos[1]:4d})"
-        mpos_w = self.game.xfm.render_to_world(mpos)
-        self.msg += f", World=({mpos_w[0]:+0.2f}, {mpos_w[1]:+0.2f})"
-
-class UI:
-    def __init__(self, game) -> None:
-        self.game = game
-    def handle_events(self) -> None:
-        for event in pygame.event.get():
-            match event.type:
-                case pygame.QUIT: sys.exit()
-                case pygame.KEYDOWN: self.KEYDOWN(event)
-                case pygame.MOUSEBUTTONDOWN: self.MOUSEBUTTONDOWN(event)
-                case pygame.MOUSEMOTION: self.MOUSEMOTION(event)
-                case _: logger.debug(event)
+class TextHud(renderer.TextHud):
+    def fps_line(self) -> str:
+        return "FPS: idle" if self.game.idle else super().fps_line()
+    def mouse_line(self, mpos:tuple, mpos_w:tuple) -> str:
+        return (f"Mouse: Render=({mpos[0]:4d},{mpos[1]:4d})"
+                f", World=({mpos_w[0]:+0.2f}, {mpos_w[1]:+0.2f})")
+    def drawings_lines(self, done_drawings:list, todo_drawings:list) -> list:
+        # No "Drew:" line: it would push the HUD down over the tile styles
+        if todo_drawings == []:
+            return [renderer.HUD_SEPARATOR, "Drew all drawings."]
+        return [renderer.HUD_SEPARATOR, f"Forgot to draw: {','.join(todo_drawings)}"]
+
+class UI(renderer.UI):
+    def handle_event(self, event) -> None:
+        self.game.last_event_ms = pygame.time.get_ticks()
+        super().handle_event(event)
     def KEYDOWN(self, event) -> None:
         kmod = pygame.key.get_mods()
         match event.key:
@@ -133,43 +130,25 @@ class UI:
             case _:
                 logger.info(event)
 
-class CpuRenderer:
-    def __init__(self, game) -> None:
-        self.game = game
-    def render(self) -> None:
-        surf = self.game.osWindow.surf
-        def render_tileMap() -> None:
-            for tile in drawing['tile_list']:
-                render_vertices = [self.game.xfm.world_to_render(p) for p in tile.art]
-                # Draw fill
-                pygame.draw.polygon(surf, tile.color, render_vertices)
-                # Draw border
-                border_color = Color.light_grey if tile.color==Color.white else Color.white
-                pygame.draw.polygon(surf, border_color, render_vertices,
-                                    width=3 if self.game.debug else 1)
-        surf.fill(Color.grey)
-        # Catch programmer error
-        todo_drawings = []                              # DEBUG
-        for name in self.game.drawings:
-            drawing = self.game.drawings[name]
-            match name:
-                case "tileMap":
-                    render_tileMap()
-                case _:
-                    todo_drawings.append(name)
-        self.game.cursor.render(surf)
-        self.game.cursor.render_styles(surf)
-        if self.game.textHud:
-            self.game.textHud.msg += f"\n{'-'*50}"
-            if todo_drawings == []:
-                self.game.textHud.msg += "\nDrew all drawings."
-            else:
-                self.game.textHud.msg += f"\nForgot to draw: {','.join(todo_drawings)}"
-            self.game.textHud.render(surf)
-        pygame.display.update()
+class CpuRenderer(renderer.CpuRenderer):
+    DEBUG_BORDER_WIDTH = 3
+    def scene_key(self, surf:Surface) -> tuple:
+        """Also redraw the whole window when the cursor style changes."""
+        return super().scene_key(surf) + (self.game.cursor.style,)
+    def moving_rects(self) -> list:
+        """Only the cursor moves every frame."""
+        cursor = self.game.cursor
+        cursor.update()
+        return [cursor.rect]
+    def render_ui(self, surf:Surface) -> None:
+        """Draw the cursor and the tile styles."""
+        cursor = self.game.cursor
+        cursor.render(surf)
+        cursor.render_styles(surf)
 
 class Cursor:
     """Cursor.render() blits ghost of selected tile type at mouse position."""
+    TILE_WIDTH = Tile.TILE_WIDTH # Move in increments of the tile width
     def __init__(self, game) -> None:
         self.game = game
         self.use_mpos = True # True if mouse moves; False if W,A,S,D pressed
@@ -180,6 +159,15 @@ class Cursor:
         self.style_dict[2] = {'color':Color.grey}
         self.style_dict[3] = {'color':Color.light_grey}
         self.style_dict[4] = {'color':Color.red}
+        self.cursor_surfs = {} # Cursor surface for each color: {((r,g,b,a), scale): Surface}
+        self.style_surfs = {}  # Style tile and style label: {(n, is_selected, scale): (Surface, Surface)}
+        self.styles_key = None # Rebuild 'styles_blits' when this changes. See Cursor().render_styles()
+        self.styles_blits = [] # Blit list for all tile styles: [(Surface, dest), ...]
+        self.rect = Rect(0,0,0,0) # Pixels covered by the cursor. See Cursor().update()
+        # Tiles are fixed-shape: get size and art once instead of making a Tile every frame
+        unit_tile = Tile((0,0), Color.white)
+        self._unit_tile_art = unit_tile.art
+        self._unit_tile_size = unit_tile.size
 
     @property
     def color(self) -> Color:
@@ -193,77 +181,116 @@ class Cursor:
             self.game.editor.place_tile(self.pos)
 
     def move(self, direction:str) -> None:
-        m = Tile().TILE_WIDTH # Move in increments of the tile width
-        match direction:
-            case "up":    self.pos = (self.pos[0],   self.pos[1]+m)
-            case "down":  self.pos = (self.pos[0],   self.pos[1]-m)
-            case "left":  self.pos = (self.pos[0]-m, self.pos[1])
-            case "right": self.pos = (self.pos[0]+m, self.pos[1])
-
-    def render(self, surf) -> None:
-        """Blit a cursor surface onto the OS Window surface."""
+        dx,dy = DIRECTIONS[direction]
+        m = self.TILE_WIDTH
+        self.pos = (self.pos[0]+dx*m, self.pos[1]+dy*m)
+
+    def update(self) -> None:
+        """Update cursor position and 'Cursor().rect' (pixels covered by the cursor)."""
         scale = self.game.scale # To convert world units to pixels
-        # TODO: use selected tile type instead of hardcoded red tile
-        tile = Tile((0,0), Color().transparent(self.color))
-        size_pixels = (tile.size[0]*scale,
-                       tile.size[1]*scale)
+        size_pixels = (self._unit_tile_size[0]*scale,
+                       self._unit_tile_size[1]*scale)
         xfm = self.game.xfm # To xfm mouse pixel coordinate to world space
-        editor = self.game.editor # To snap to grid
         # Snap mouse to tile grid coordinates
         if self.use_mpos:
             # Use mouse position to update World space cursor position
             mpos = pygame.mouse.get_pos() # Get mouse position in pixels
-            self.pos = editor.snap_pos_to_grid(xfm.render_to_world(mpos)) # Xfm and snap
+            self.pos = xfm.render_to_world_snapped(mpos) # Xfm and snap to tile grid
         mpos = xfm.world_to_render(self.pos) # Xfm back to pixels
         # DEBUG
-        if self.game.textHud: self.game.textHud.msg += f"\nCursor: {self.pos}"
+        if self.game.debug: self.game.textHud.lines.append(f"Cursor: {self.pos}")
         # Center tile on mouse
         tile_frect = FRect(mpos, size_pixels) # Make an FRect (+y is up) in pixel space
         tile_rect = pygame.Rect(tile_frect.bottomleft, size_pixels) # +y is down
-        # Create a surface to draw the tile
-        ### Surface((width, height), flags=0, depth=0, masks=None) -> Surface
-        cursor_surf = pygame.Surface((size_pixels[0]+1, size_pixels[1]+1), flags=pygame.SRCALPHA)
-        # Draw the tile on this surface
-        render_vertices = [xfm.world_to_render(p, cursor_surf) for p in tile.art]
-        # Draw fill
-        pygame.draw.polygon(cursor_surf, tile.color, render_vertices)
-        # Draw border
-        pygame.draw.polygon(cursor_surf, Color.white, render_vertices, width=1)
+        self.rect = Rect(tile_rect.topleft, (size_pixels[0]+1, size_pixels[1]+1)) # Size of cursor surface
+
+    def render(self, surf) -> Rect:
+        """Blit a cursor surface onto the OS Window surface. Call update() first."""
+        # TODO: use selected tile type instead of hardcoded red tile
+        cursor_surf = self.cursor_surf(self.color)
         ### blit(source, dest, area=None, special_flags=0) -> Rect
-        surf.blit(cursor_surf, tile_rect.topleft, special_flags=pygame.BLEND_ALPHA_SDL2)# Use alpha blending
+        return surf.blit(cursor_surf, self.rect.topleft, special_flags=pygame.BLEND_ALPHA_SDL2)# Use alpha blending
+
+    def cursor_surf(self, color:Color) -> Surface:
+        """Return the cursor Surface for this style color. Only draw it once."""
+        key = (tuple(color), self.game.scale) # pygame.Color is not hashable
+        if key not in self.cursor_surfs:
+            xfm = self.game.xfm
+            scale = self.game.scale
+            size = self._unit_tile_size
+            size_pixels = (size[0]*scale, size[1]*scale)
+            color = Color().transparent(color)
+            # Create a surface to draw the tile
+            ### Surface((width, height), flags=0, depth=0, masks=None) -> Surface
+            cursor_surf = pygame.Surface((size_pixels[0]+1, size_pixels[1]+1), flags=pygame.SRCALPHA)
+            # Draw the tile on this surface
+            render_vertices = [xfm.world_to_render(p, cursor_surf) for p in self._unit_tile_art]
+            # Draw fill
+            pygame.draw.polygon(cursor_surf, color, render_vertices)
+            # Draw border
+            pygame.draw.polygon(cursor_surf, Color.white, render_vertices, width=1)
+            self.cursor_surfs[key] = cursor_surf
+        return self.cursor_surfs[key]
 
     def render_styles(self, surf) -> None:
-        """Blit tyle style surfaces onto the OS Window surface."""
-        xfm = self.game.xfm
-        scale = self.game.scale
+        """Blit tyle style surfaces onto the OS Window surface.
+
+        The blit list only changes when the selected style, the window size,
+        or the scale changes. See Cursor().styles_blit_list().
+        """
+        key = (self.style, surf.get_size(), self.game.scale)
+        if key != self.styles_key:
+            self.styles_key = key
+            self.styles_blits = self.styles_blit_list(surf)
+        surf.blits(self.styles_blits, doreturn=0)
+
+    def styles_blit_list(self, surf) -> list:
+        """Return [(Surface, dest), ...] to draw the tile styles and their labels."""
+        # Local names for look-ups in loop
+        world_to_render = self.game.xfm.world_to_render
+        style_surf = self.style_surf
+        blit_list = []
         for n in self.style_dict:
-            # Get color, pixel-space vertices, and pixel space Rect for surf position
-            name = str(n)
-            style = self.style_dict[n]
-            color = style['color']
-            tile = Tile((0,0), color)
-            size_pixels = (tile.size[0]*scale, tile.size[1]*scale)
+            # Get style surfaces and pixel space Rect for surf position
+            tile_surf, text_surf = style_surf(n)
+            size_pixels = (tile_surf.get_width()-1, tile_surf.get_height()-1)
             pos_w = (-1+2*n,2) # World coordinates
-            pos_p = xfm.world_to_render(pos_w) # Render coordinates
+            pos_p = world_to_render(pos_w, surf) # Render coordinates
             tile_frect = FRect(pos_p, size_pixels)
             tile_rect = pygame.Rect(tile_frect.bottomleft, size_pixels)
+            # Draw to OS Window
+            blit_list.append((tile_surf, tile_rect.topleft))
+            # Add Text under the style
+            # Use text width to center the position
+            w = text_surf.get_width()
+            blit_list.append((text_surf, (tile_rect.midbottom[0] - w/2, tile_rect.midbottom[1])))
+        return blit_list
+
+    def style_surf(self, n:int) -> tuple:
+        """Return (tile Surface, label Surface) for style n. Only draw them once.
+
+        The selected style has a wider border, so each style has two versions:
+        selected and not selected.
+        """
+        key = (n, self.style==n, self.game.scale)
+        if key not in self.style_surfs:
+            xfm = self.game.xfm
+            scale = self.game.scale
+            name = str(n)
+            style = self.style_dict[n]
+            color = style['color']
+            size = self._unit_tile_size
+            size_pixels = (size[0]*scale, size[1]*scale)
             tile_surf = pygame.Surface((size_pixels[0]+1, size_pixels[1]+1))
-            render_vertices = [xfm.world_to_render(p, tile_surf) for p in tile.art]
-            pygame.draw.polygon(tile_surf, tile.color, render_vertices)
-            border_color = Color.light_grey if tile.color==Color.white else Color.white
+            render_vertices = [xfm.world_to_render(p, tile_surf) for p in self._unit_tile_art]
+            pygame.draw.polygon(tile_surf, color, render_vertices)
+            border_color = Color().border(color)
             pygame.draw.polygon(tile_surf, border_color, render_vertices,
                                 width=5 if self.style==n else 1)
-            # Draw to OS Window
-            surf.blit(tile_surf, tile_rect.topleft)
-            # Add Text under the style
             text = Text()
-            text.msg = name
-            # Find the width of the text
-            _surf = text.font.render(text.msg, True, Color.white)
-            w = _surf.get_width()
-            # Use text width to center the position
-            text.pos = (tile_rect.midbottom[0] - w/2, tile_rect.midbottom[1])
-            text.render(surf)
+            text_surf = text.font.render(name, True, Color.white)
+            self.style_surfs[key] = (tile_surf, text_surf)
+        return self.style_surfs[key]
 
 class Editor:
     def __init__(self, game) -> None:
@@ -277,20 +304,16 @@ class Editor:
         color = self.game.cursor.color
         behavior = "stop"
         tile = Tile(pos, color, behavior)
-        self.game.tileMap.tile_dict[tile.name] = tile
+        self.game.tileMap.add_tile(tile)
 
     def has_tile(self, pos_world:tuple) -> bool:
         pos = self.snap_pos_to_grid(pos_world)
-        tile_name = str(pos)
         tile_dict = self.game.tileMap.tile_dict
-        return tile_name in tile_dict
+        return pos in tile_dict
 
     def erase_tile(self, pos_world:tuple) -> None:
         pos = self.snap_pos_to_grid(pos_world)
-        tile_name = str(pos)
-        tile_dict = self.game.tileMap.tile_dict
-        if self.has_tile(pos_world):
-            del tile_dict[tile_name]
+        self.game.tileMap.remove_tile(pos)
 
 class TileMapEditor(TileMap):
     def __init__(self, game) -> None:
@@ -310,21 +333,36 @@ class Game:
         self.scale = 30 # Num pixels equal to 1 unit of world space
         self.clock = pygame.time.Clock()
         self.xfm = Xfm(self)
+        self.textHud = TextHud(self)
         self.cursor = Cursor(self)
         self.drawings = {}
         # Drawable game objects
         self.tileMap = TileMapEditor(self)
+        self.last_event_ms = 0 # Time of the last event. See Game().idle
+
+    @property
+    def idle(self) -> bool:
+        """True if there were no events in the last IDLE_AFTER_MS."""
+        return pygame.time.get_ticks() - self.last_event_ms > IDLE_AFTER_MS
 
     def run(self) -> None:
         while True: self.game_loop()
 
     def game_loop(self) -> None:
-        self.textHud = TextHud(self) if self.debug else None
+        idle = self.idle
+        if idle:
+            # Sleep until the next event instead of drawing 60 frames per second
+            ### wait(timeout) -> Event
+            event = pygame.event.wait(IDLE_WAIT_MS)
+            # Handle it now: it came before anything still in the queue
+            if event.type != pygame.NOEVENT: self.uI.handle_event(event)
         self.uI.handle_events()
+        if self.debug: self.textHud.reset()
         self.update_drawings()
         self.cpuRenderer.render()
         ### tick(framerate=0) -> milliseconds
-        self.clock.tick(60)
+        if idle: self.clock.tick()  # Event wait already paced this frame
+        else: self.clock.tick(60)
 
     def update_drawings(self) -> None:
         self.tileMap.draw()
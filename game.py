@@ -11,19 +11,34 @@
   something different inspired by talking to Brian.
 * [x] Objects "draw" by writing draw data to self.game.drawings
 * [x] CpuRenderer uses Xfm to convert vertices from world space to screen space
+    * Considered a compiled (numba) vertex transform for big tile maps. Not
+      needed: render_tileMap() only transforms one topleft per visible tile
+      (one Xfm.world_to_render_list() call per frame), and TileMap.draw()
+      culls tiles outside the window. numba is not a dependency either.
 * [ ] Xfm knows how to convert drawn objects to renderable objects
 * [ ] GpuRenderer uses Xfm to convert the large global of drawings into renderable objects and then renders them.
+    * Tried a GpuRenderer for the tilemap: a Texture atlas of the tile styles,
+      drawn with pygame._sdl2.video.Renderer.
+    * pygame 2.6 Renderer has no batched geometry call (no SDL_RenderGeometry),
+      so it is still one Texture.draw() per tile. Also, once the window has a
+      Renderer, the cursor, HUD, and style Surfaces all have to become
+      Textures.
+    * Not worth it yet. For now CpuRenderer blits pre-rendered tile sprites
+      in one surf.blits() call. Revisit when pygame exposes geometry batching.
 * The new flow for drawing:
     * game_loop() calls update_drawings()
         * this calls the draw() method on every game world object (player, tiles, etc.)
         * the draw() method writes to dict Game.drawings()
     * renderer iterates over Game.drawings():
         * dict keys are the drawing 'name'; use 'name' to look up how to render
-        * if 'name' matches, append 'name' to list 'done_drawings', else 'todo_drawings'
+          in 'CpuRenderer().renderers'
+        * if 'name' is not in 'renderers', append 'name' to list 'todo_drawings'
 * [x] wasd moves the player in World space coordinates
     * This required changing 'hitbox' from attribute Player.hitbox to
     '@property' Player.hitbox so that an access of 'hitbox' forces a
     recalculation of hitbox from Player.pos.
+    * Now 'pos' is the '@property' instead: assigning to Player.pos moves
+    the hitbox, so reading 'hitbox' does not create an FRect.
 * [x] DO NOT USE pygame.Rect for world space tiles!
     * Rect(left, top, width, height) only allows integer values
     * Say a Rect has x,y = 0,0 and w,h = 1,1
@@ -76,7 +91,8 @@ from pathlib import Path
 from pygame import Rect, Surface
 from libs.frect import FRect
 from libs.utils import setup_logging
-from libs.utils import OsWindow, Color, Text, Xfm
+from libs.utils import OsWindow, Color, Xfm
+from libs import renderer
 from libs.tile import Tile, TileMap, TileMapEncoder, decode_tile_map_json, Physics
 
 def shutdown(filename:str) -> None:
@@ -85,15 +101,7 @@ def shutdown(filename:str) -> None:
     pygame.quit()
 
 
-class UI:
-    def __init__(self, game) -> None:
-        self.game = game
-    def handle_events(self) -> None:
-        for event in pygame.event.get():
-            match event.type:
-                case pygame.QUIT: sys.exit()
-                case pygame.KEYDOWN: self.KEYDOWN(event)
-                case _: logger.debug(event)
+class UI(renderer.UI):
     def KEYDOWN(self, event) -> None:
         kmod = pygame.key.get_mods()
         match event.key:
@@ -119,77 +127,45 @@ class UI:
                     pass
             case _: logger.debug(event)
 
-class CpuRenderer:
+class CpuRenderer(renderer.CpuRenderer):
     def __init__(self, game) -> None:
-        self.game = game
-    def render(self) -> None:
-        surf = self.game.osWindow.surf
-        def render_player() -> None:
-            """Draw player as a polygon. If debug, draw player's debug tiles as polygons."""
-            assert drawing['vertices']                  # game.drawings['player']['vertices']
-            assert drawing['color']                     # game.drawings['player']['color']
-            ### blit(source, dest, area=None, special_flags=0) -> Rect
-            render_vertices = [self.game.xfm.world_to_render(p) for p in drawing['vertices']]
-            pygame.draw.polygon(surf, drawing['color'], render_vertices)
-            if drawing['debug']:
-                assert drawing['debug']['tiles_overlay']        # game.drawings['player']['debug']['tiles_overlay']
-                assert drawing['debug']['color']        # game.drawings['player']['debug']['color']
-                for tile in drawing['debug']['tiles_overlay']:
-                    render_vertices = [self.game.xfm.world_to_render(p) for p in tile]
-                    pygame.draw.polygon(surf, drawing['debug']['color'],
-                                        render_vertices, width=2)
-        def render_tileMap() -> None:
-            """Draw tiles as polygons."""
-            for tile in drawing['tile_list']:
-                render_vertices = [self.game.xfm.world_to_render(p) for p in tile.art]
-                # Draw fill
-                pygame.draw.polygon(surf, tile.color, render_vertices)
-                # Draw border
-                border_color = Color.light_grey if tile.color==Color.white else Color.white
-                pygame.draw.polygon(surf, border_color, render_vertices, width=2 if self.game.debug else 1)
-        self.game.osWindow.surf.fill(Color.grey)
-        # Catch programmer error
-        done_drawings = []                              # DEBUG
-        todo_drawings = []                              # DEBUG
-        # Look up how to render each drawing
-        for name in self.game.drawings:
-            drawing = self.game.drawings[name]
-            match name:
-                case "player":
-                    render_player()
-                    done_drawings.append(name)   # DEBUG
-                case "tileMap":
-                    render_tileMap()
-                    done_drawings.append(name)   # DEBUG
-                case _:
-                    todo_drawings.append(name)   # DEBUG
-        # DEBUG
-        # List drawings I haven't drawn in the HUD
-        if self.game.textHud:
-            self.game.textHud.msg += f"\n{'-'*50}"
-            self.game.textHud.msg += f"\nDrew: {','.join(done_drawings)}"
-            if todo_drawings == []:
-                self.game.textHud.msg += "\nDrew all drawings."
-            else:
-                self.game.textHud.msg += f"\nForgot to draw: {','.join(todo_drawings)}"
-            self.game.textHud.render(self.game.osWindow.surf)
-        pygame.display.update()
-
-class TextHud(Text):
-    def __init__(self, game) -> None:
-        self.game = game
-        super().__init__()
-        ### pygame.time.Clock.get_fps() -> float
-        self.msg += f"FPS: {self.game.clock.get_fps():0.1f}"
-        ### get_pos() -> (x, y)
-        mpos = pygame.mouse.get_pos()
-        self.msg += f"\nMouse: Render=({mpos[0]:4d},{mpos[1]:4d})"
-        mpos_w = self.game.xfm.render_to_world(mpos)
-        self.msg += f", World=({mpos_w[0]:+0.2f}, {mpos_w[1]:+0.2f})({mpos_w[0]:+0.0f},{mpos_w[1]:+0.0f})"
+        super().__init__(game)
+        self.renderers['player'] = self.render_player
+    def render_player(self, surf:Surface, drawing:dict) -> None:
+        """Draw player as a polygon. If debug, draw player's debug tiles as polygons."""
+        assert drawing['vertices']                  # game.drawings['player']['vertices']
+        assert drawing['color']                     # game.drawings['player']['color']
+        # Local names for look-ups in loops
+        world_to_render_list = self.game.xfm.world_to_render_list
+        draw_polygon = pygame.draw.polygon
+        render_vertices = world_to_render_list(drawing['vertices'])
+        draw_polygon(surf, drawing['color'], render_vertices)
+        if drawing['debug']:
+            assert drawing['debug']['tiles_overlay']        # game.drawings['player']['debug']['tiles_overlay']
+            assert drawing['debug']['color']        # game.drawings['player']['debug']['color']
+            debug_color = drawing['debug']['color']
+            # Xfm the vertices of all debug tiles in one call, then draw four at a time
+            tiles = drawing['debug']['tiles_overlay']
+            render_vertices = world_to_render_list([p for tile in tiles for p in tile])
+            for i in range(0, len(render_vertices), 4):
+                draw_polygon(surf, debug_color, render_vertices[i:i+4], width=2)
+    def player_rect(self, drawing:dict) -> Rect:
+        """Return the pixels covered by the player drawing."""
+        render_vertices = self.game.xfm.world_to_render_list(drawing['vertices'])
+        xs = [p[0] for p in render_vertices]; ys = [p[1] for p in render_vertices]
+        rect = Rect(min(xs), min(ys), max(xs)-min(xs)+1, max(ys)-min(ys)+1)
+        return rect.inflate(4,4) # Include debug tile borders (width=2)
+    def moving_rects(self) -> list:
+        """Only the player moves every frame."""
+        if 'player' not in self.game.drawings: return []
+        return [self.player_rect(self.game.drawings['player'])]
 
 class Player:
     def __init__(self, game) -> None:
         self.game = game
+        self._hitbox = FRect(center=(0,0), size=self.size) # See Player().pos
+        self._debug_tiles_key = None # (pos, size) of the cached debug tiles. See Player().debug_tiles
+        self._debug_tiles = []
         self.pos = (-1,0) # Player starts in center of screen
 
     @property
@@ -197,10 +173,18 @@ class Player:
         w = self.game.player_width
         return (w,w)
 
+    @property
+    def pos(self) -> tuple:
+        return self._hitbox.center
+
+    @pos.setter
+    def pos(self, p:tuple) -> None:
+        """Move the player by moving its hitbox."""
+        self._hitbox.center = p
+
     @property
     def hitbox(self) -> FRect:
-        _hitbox = FRect(center=self.pos, size=self.size)
-        return _hitbox
+        return self._hitbox
 
     @property
     def debug_tiles(self) -> list:
@@ -208,7 +192,7 @@ class Player:
 
         Overlay the player with debug tiles.
 
-        Return list of tiles, each tile is a list of four vertices.
+        Return list of tiles, each tile is a tuple of four vertices.
 
         Explanation
         -----------
@@ -221,7 +205,7 @@ class Player:
                 FRect((x+1-0.5,y+1-0.5), (1,1)), # topright
                 ]
 
-        Each tile FRect is converted to a list of four vertices.
+        Each tile FRect is converted to its four vertices (FRect().corners()).
 
         Position the tiles based on player size (w,h):
 
@@ -234,7 +218,17 @@ class Player:
 
         sx = s*(w-1)
         sy = s*(h-1)
+
+        The tiles are cached until the player moves or changes size.
         """
+        key = (self.pos, self.size)
+        if key != self._debug_tiles_key:
+            self._debug_tiles_key = key
+            self._debug_tiles = self._make_debug_tiles()
+        return self._debug_tiles
+
+    def _make_debug_tiles(self) -> list:
+        """Return list of debug tiles. See Player().debug_tiles"""
         # NOTE: Tile size is not hardcoded.
         # NOTE: This debug-tile generation works for any player size.
         # TODO: Make this work with tile sizes other than (1,1)
@@ -248,37 +242,26 @@ class Player:
             for i in range(w):
                 sx = s*(w-1); sy = s*(h-1)
                 tiles.append(FRect((x+i-sx,y+j-sy), (t,t)))
-        # Convert each tile FRect to a list of vertices
-        tile_art = []
-        for tile in tiles:
-            tile_art.append([
-                tile.topleft,
-                tile.topright,
-                tile.bottomright,
-                tile.bottomleft,
-                ])
-        return tile_art
+        # Convert each tile FRect to its four vertices
+        return [tile.corners() for tile in tiles]
 
     @property
-    def vertices(self) -> list:
-        """Return the four vertices of the hitbox"""
-        return [list(self.hitbox.topleft),
-                list(self.hitbox.topright),
-                list(self.hitbox.bottomright),
-                list(self.hitbox.bottomleft)]
+    def vertices(self) -> tuple:
+        """Return the four vertices of the hitbox. Cached until the player moves or changes size."""
+        return self._hitbox.corners()
 
     def draw(self) -> None:
         """Draw by declaring what is in the drawing. Update Game.drawings['player']."""
         # Draw player artwork (vertices that define a filled polygon)
-        self.game.drawings['player'] = {}               # Create drawing "player"
-        self.game.drawings['player']['vertices'] = self.vertices
-        self.game.drawings['player']['color'] = Color.red
+        drawing = self.game.drawings['player'] = {}     # Create drawing "player"
+        drawing['vertices'] = self.vertices
+        drawing['color'] = Color.red
         # Draw debug artwork (tiles) for player
-        self.game.drawings['player']['debug'] = None    # Render "if drawing['debug']"
+        drawing['debug'] = None                         # Render "if drawing['debug']"
         if self.game.debug:
-            self.game.drawings['player']['debug'] = {}  # Create drawing "player.debug"
-            self.game.drawings['player']['debug']['color'] = Color.white
-            self.game.drawings['player']['debug']['tiles_overlay'] = self.debug_tiles
+            drawing['debug'] = {}                       # Create drawing "player.debug"
+            drawing['debug']['color'] = Color.white
+            drawing['debug']['tiles_overlay'] = self.debug_tiles
 
     # TODO: add animation (call player.move() to do more than just call physics.move())
     def move(self, direction:str) -> None:
@@ -290,10 +273,12 @@ class Player:
                 logger.debug("grow")
                 # Player can get arbitrarily large
                 self.game.player_width = self.game.player_width + 1
+                self._hitbox.size = self.size
             case "shrink":
                 logger.debug("shrink")
                 # Player cannot be smaller than (1,1) in World space
                 self.game.player_width = max(self.game.player_width - 1, 1)
+                self._hitbox.size = self.size
 
 class TileMapGame(TileMap):
     """Dict of tiles. Each tile is a Tile().
@@ -315,13 +300,12 @@ class TileMapGame(TileMap):
 
     # DEBUGGING
     def load_to_debug_serialization(self) -> None:
-        self.tile_dict = {}
+        self.clear()
         positions = [(1,-1),      (2,-1),           (3,-1),         (5,-1)]
         colors    = [Color.white, Color.light_grey, Color.med_grey, Color.red]
         behaviors = ['push',      'pass',           'push',         'stop']
         for pos,color,behavior in zip(positions, colors, behaviors):
-            tile = Tile(pos, color, behavior)
-            self.tile_dict[tile.name] = tile
+            self.add_tile(Tile(pos, color, behavior))
 
 class Game:
     def __init__(self) -> None:
@@ -337,6 +321,7 @@ class Game:
         self.player_width = 2*self.tile_width # Player width in World space. Pick any player_width
         self.scale = 30 # Num pixels equal to 1 unit of world space
         self.xfm = Xfm(self)
+        self.textHud = renderer.TextHud(self)
         self.drawings = {}
         # Drawable game objects
         self.player = Player(self)
@@ -345,7 +330,7 @@ class Game:
     @property
     def tile_width(self) -> int:
         """Tile width in World space."""
-        return Tile().TILE_WIDTH
+        return Tile.TILE_WIDTH
 
     @property
     def movement_amount(self) -> float:
@@ -356,8 +341,8 @@ class Game:
         while True: self.game_loop()
 
     def game_loop(self) -> None:
-        self.textHud = TextHud(self) if self.debug else None
         self.uI.handle_events()
+        if self.debug: self.textHud.reset()
         self.update_drawings()                          # Update global drawing dict
         self.cpuRenderer.render()                       # Render drawing dict on CPU
         ### tick(framerate=0) -> milliseconds
@@ -3,9 +3,6 @@
 """Floating point rectangles for world space tiles.
 """
 
-from dataclasses import dataclass
-
-@dataclass
 class FRect:
     """Rect with floating point values.
 
@@ -15,6 +12,8 @@ class FRect:
     Attributes
     ----------
 
+        left, right, top, bottom
+        centerx, centery
         topleft
         topright
         bottomright
@@ -31,73 +30,163 @@ class FRect:
     >>> rect.topleft = rect.center # Move back by assignment the other way
     >>> rect.center
     (10.0, 10.0)
+
+    The edges (left, right, top, bottom) and centerx, centery are
+    calculated once when the center or size is set, not every time they are
+    read. Collision detection reads the edges of every tile.
+
+    >>> rect.centerx, rect.centery
+    (10.0, 10.0)
+
+    Assigning an edge, centerx, or centery moves the whole FRect (it does
+    not resize it).
+
+    >>> rect.left = 0.0
+    >>> rect.center, rect.right
+    ((0.5, 10.0), 1.0)
     """
-    center:tuple
-    size:tuple
+    __slots__ = ('_center', '_size', '_left', '_right', '_top', '_bottom', '_centerx', '_centery',
+                 '_corners')
+
+    def __init__(self, center:tuple, size:tuple) -> None:
+        self._size = size
+        self.center = center # Calculate the edges
+
+    def __repr__(self) -> str:
+        return f"FRect(center={self._center!r}, size={self._size!r})"
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, FRect): return NotImplemented
+        return (self._center, self._size) == (other._center, other._size)
+
+    @property
+    def center(self) -> tuple:
+        return self._center
+
+    @center.setter
+    def center(self, p:tuple) -> None:
+        """Move FRect to center p. Update the edges."""
+        x,y = p; w,h = self._size
+        self._center = p
+        self._centerx = x
+        self._centery = y
+        self._left = x-(w/2)
+        self._right = x+(w/2)
+        self._top = y+(h/2)
+        self._bottom = y-(h/2)
+        self._corners = None # See FRect().corners()
+
+    @property
+    def size(self) -> tuple:
+        return self._size
+
+    @size.setter
+    def size(self, size:tuple) -> None:
+        """Resize FRect about its center. Update the edges."""
+        self._size = size
+        self.center = self._center
+
+    def corners(self) -> tuple:
+        """Return (topleft, topright, bottomright, bottomleft).
+
+        Cached until the FRect moves or changes size.
+
+        >>> FRect((0,0), (2,2)).corners()
+        ((-1.0, 1.0), (1.0, 1.0), (1.0, -1.0), (-1.0, -1.0))
+        """
+        if self._corners is None:
+            left, right, top, bottom = self._left, self._right, self._top, self._bottom
+            self._corners = ((left, top), (right, top), (right, bottom), (left, bottom))
+        return self._corners
+
+    @property
+    def centerx(self) -> float:
+        return self._centerx
+    @property
+    def centery(self) -> float:
+        return self._centery
+
+    @centerx.setter
+    def centerx(self, x:float) -> None:
+        """Move FRect so that centerx == x."""
+        self.center = (x, self._centery)
+    @centery.setter
+    def centery(self, y:float) -> None:
+        """Move FRect so that centery == y."""
+        self.center = (self._centerx, y)
 
     @property
     def left(self) -> float:
-        x,y = self.center; w,h = self.size
-        return x-(w/2)
+        return self._left
     @property
     def right(self) -> float:
-        x,y = self.center; w,h = self.size
-        return x+(w/2)
+        return self._right
     @property
     def top(self) -> float:
-        x,y = self.center; w,h = self.size
-        return y+(h/2)
+        return self._top
     @property
     def bottom(self) -> float:
-        x,y = self.center; w,h = self.size
-        return y-(h/2)
+        return self._bottom
+
+    @left.setter
+    def left(self, x:float) -> None:
+        """Move FRect so that left == x."""
+        self.center = (x + (self._size[0]/2), self._center[1])
+    @right.setter
+    def right(self, x:float) -> None:
+        """Move FRect so that right == x."""
+        self.center = (x - (self._size[0]/2), self._center[1])
+    @top.setter
+    def top(self, y:float) -> None:
+        """Move FRect so that top == y."""
+        self.center = (self._center[0], y - (self._size[1]/2))
+    @bottom.setter
+    def bottom(self, y:float) -> None:
+        """Move FRect so that bottom == y."""
+        self.center = (self._center[0], y + (self._size[1]/2))
 
     @property
     def topleft(self) -> tuple:
         """Return topleft of FRect."""
-        x,y = self.center; w,h = self.size
-        return (x - (w/2), y + (h/2))
+        return (self._left, self._top)
 
     @property
     def topright(self) -> tuple:
         """Return topright of FRect."""
-        x,y = self.center; w,h = self.size
-        return (x + (w/2), y + (h/2))
+        return (self._right, self._top)
 
     @property
     def bottomright(self) -> tuple:
         """Return bottomright of FRect."""
-        x,y = self.center; w,h = self.size
-        return (x + (w/2), y - (h/2))
+        return (self._right, self._bottom)
 
     @property
     def bottomleft(self) -> tuple:
         """Return bottomleft of FRect."""
-        x,y = self.center; w,h = self.size
-        return (x - (w/2), y - (h/2))
+        return (self._left, self._bottom)
 
     @topleft.setter
     def topleft(self, p:tuple) -> None:
         """Set FRect.center so that topleft == p."""
-        x,y = p; w,h = self.size
+        x,y = p; w,h = self._size
         self.center = (x + (w/2), y - (h/2))
 
     @topright.setter
     def topright(self, p:tuple) -> None:
         """Set FRect.center so that topright == p."""
-        x,y = p; w,h = self.size
+        x,y = p; w,h = self._size
         self.center = (x - (w/2), y - (h/2))
 
     @bottomright.setter
     def bottomright(self, p:tuple) -> None:
         """Set FRect.center so that bottomright == p."""
-        x,y = p; w,h = self.size
+        x,y = p; w,h = self._size
         self.center = (x - (w/2), y + (h/2))
 
     @bottomleft.setter
     def bottomleft(self, p:tuple) -> None:
         """Set FRect.center so that bottomleft == p."""
-        x,y = p; w,h = self.size
+        x,y = p; w,h = self._size
         self.center = (x + (w/2), y + (h/2))
 
 if __name__ == '__main__':
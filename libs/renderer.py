@@ -0,0 +1,210 @@
+#!/usr/bin/env python
+# vim: set fileencoding=utf-8 :
+"""Renderer, debug HUD, and event handling shared by game.py and editor.py.
+
+game.py and editor.py subclass these:
+
+* UI: subclass sets the key bindings (KEYDOWN) and mouse handlers
+* CpuRenderer: subclass says what moves every frame (moving_rects()) and
+  what to draw on top of the drawings (render_ui())
+"""
+
+import sys
+import pygame
+from pygame import Rect, Surface
+if __name__ == '__main__' or not __package__: # Run from libs/ (doctests, unittest)
+    from utils import Color, Text
+    from tile import Tile
+else:
+    from libs.utils import Color, Text
+    from libs.tile import Tile
+import logging
+logger = logging.getLogger(__name__)
+
+SPRITE_COLORKEY = (255,0,255) # Transparent pixels in tile sprites. Not a tile color.
+HUD_SEPARATOR = '-'*50 # Debug HUD line between the frame info and the drawing info
+
+
+class TextHud(Text):
+    """Debug HUD. Create once. Call reset() at the start of each frame.
+
+    Add lines to the HUD with 'textHud.lines.append(line)'. render() blits
+    the lines (no 'textHud.msg' to build every frame).
+    """
+    def __init__(self, game) -> None:
+        self.game = game
+        super().__init__()
+        self.lines = [] # HUD message, one string per line
+
+    def reset(self) -> None:
+        """Start a new HUD message."""
+        self.lines.clear()
+        self.lines.append(self.fps_line())
+        ### get_pos() -> (x, y)
+        mpos = pygame.mouse.get_pos()
+        mpos_w = self.game.xfm.render_to_world(mpos)
+        self.lines.append(self.mouse_line(mpos, mpos_w))
+
+    def fps_line(self) -> str:
+        ### pygame.time.Clock.get_fps() -> float
+        fps = self.game.clock.get_fps()
+        return f"FPS: {fps:0.0f}"
+
+    def mouse_line(self, mpos:tuple, mpos_w:tuple) -> str:
+        """Mouse position in Render space (mpos) and World space (mpos_w)."""
+        return (f"Mouse: Render=({mpos[0]:4d},{mpos[1]:4d})"
+                f", World=({mpos_w[0]:+0.2f}, {mpos_w[1]:+0.2f})({mpos_w[0]:+0.0f},{mpos_w[1]:+0.0f})")
+
+    def drawings_lines(self, done_drawings:list, todo_drawings:list) -> list:
+        """Lines that list what CpuRenderer drew (and forgot to draw). See CpuRenderer().render()"""
+        lines = [HUD_SEPARATOR, f"Drew: {','.join(done_drawings)}"]
+        if todo_drawings == []:
+            lines.append("Drew all drawings.")
+        else:
+            lines.append(f"Forgot to draw: {','.join(todo_drawings)}")
+        return lines
+
+    def render(self, surf:Surface) -> Rect:
+        return self.render_lines(surf, self.lines)
+
+class UI:
+    def __init__(self, game) -> None:
+        self.game = game
+    def handle_events(self) -> None:
+        for event in pygame.event.get():
+            self.handle_event(event)
+    def handle_event(self, event) -> None:
+        match event.type:
+            case pygame.QUIT: sys.exit()
+            case pygame.KEYDOWN: self.KEYDOWN(event)
+            case pygame.MOUSEBUTTONDOWN: self.MOUSEBUTTONDOWN(event)
+            case pygame.MOUSEMOTION: self.MOUSEMOTION(event)
+            # OS Window pixels were lost (window was covered, minimized, ...)
+            case (pygame.VIDEOEXPOSE | pygame.WINDOWEXPOSED | pygame.WINDOWRESTORED
+                  | pygame.WINDOWSHOWN | pygame.WINDOWFOCUSGAINED):
+                self.game.cpuRenderer.redraw_all()
+            case _: logger.debug(event)
+    def KEYDOWN(self, event) -> None:
+        logger.debug(event)
+    def MOUSEBUTTONDOWN(self, event) -> None:
+        logger.debug(event)
+    def MOUSEMOTION(self, event) -> None:
+        logger.debug(event)
+
+class CpuRenderer:
+    """Render 'Game().drawings' to the OS Window with pygame blits and draw calls.
+
+    Redraw the whole window when the scene changes (see scene_key()) or
+    when the OS Window lost its pixels (see redraw_all()). Otherwise only redraw the pixels of what moves every frame (see
+    moving_rects()) and the HUD.
+    """
+    DEBUG_BORDER_WIDTH = 2 # Tile border width in debug mode
+    def __init__(self, game) -> None:
+        self.game = game
+        self.tile_sprites = {} # Pre-rendered tiles: {((r,g,b,a), border_width, scale): Surface}
+        self.tile_drawing = None   # Drawing 'tile_blits' was made from
+        self.tile_blits_key = None # Rebuild 'tile_blits' when the drawing or this changes. See CpuRenderer().render_tileMap()
+        self.tile_blits = []       # Blit list for the visible tiles: [(Surface, topleft), ...]
+        self.scene = None      # Redraw whole window when this changes. See CpuRenderer().render()
+        self.dirty_rects = []  # Rects drawn last frame that change every frame. See CpuRenderer().moving_rects()
+        # How to render each drawing: {name: render_fn(surf, drawing)}
+        self.renderers = {'tileMap': self.render_tileMap}
+    def tile_sprite(self, color:pygame.Color, border_width:int) -> Surface:
+        """Return a Surface with one tile (fill and border) drawn on it.
+
+        Draw each tile style once (per scale), the first time it is used. After that,
+        rendering a tile is a blit of this Surface.
+
+        A thick border is drawn past the tile edges. The Surface is padded by
+        border_width on every side so the border is not cut off: blit it at
+        the tile topleft minus border_width. The padding is transparent
+        (colorkey SPRITE_COLORKEY).
+        """
+        key = (tuple(color), border_width, self.game.scale) # pygame.Color is not hashable
+        if key not in self.tile_sprites:
+            xfm = self.game.xfm
+            tile = Tile((0,0), color)
+            size_pixels = (tile.size[0]*self.game.scale, tile.size[1]*self.game.scale)
+            unpadded_size = (size_pixels[0]+1, size_pixels[1]+1)
+            pad = border_width
+            tile_surf = pygame.Surface((unpadded_size[0]+2*pad, unpadded_size[1]+2*pad))
+            tile_surf.fill(SPRITE_COLORKEY)
+            tile_surf.set_colorkey(SPRITE_COLORKEY, pygame.RLEACCEL)
+            # Tile is centered on tile_surf: tile topleft is at (pad, pad)
+            render_vertices = [xfm.world_to_render(p, tile_surf) for p in tile.art]
+            # Draw fill
+            pygame.draw.polygon(tile_surf, tile.color, render_vertices)
+            # Draw border
+            border_color = Color().border(tile.color)
+            pygame.draw.polygon(tile_surf, border_color, render_vertices, width=border_width)
+            self.tile_sprites[key] = tile_surf
+        return self.tile_sprites[key]
+    def render_tileMap(self, surf:Surface, drawing:dict) -> None:
+        """Draw tiles by blitting tile sprites.
+
+        The blit list is cached until the drawing (the visible tiles), the
+        xfm, or the border width changes.
+        """
+        xfm = self.game.xfm
+        border_width = self.DEBUG_BORDER_WIDTH if self.game.debug else 1
+        # 'drawing' is only replaced when the visible tiles change. See TileMap().draw()
+        key = (xfm.matrix(surf), border_width)
+        if drawing is not self.tile_drawing or key != self.tile_blits_key:
+            self.tile_drawing = drawing
+            self.tile_blits_key = key
+            # Blit pre-rendered tiles. Blit destination is the tile topleft.
+            topleft_list = xfm.world_to_render_list(drawing['tile_topleft'], surf)
+            tile_sprite = self.tile_sprite # Local name for look-up in loop
+            pad = border_width # Sprites are padded for the border. See CpuRenderer().tile_sprite()
+            self.tile_blits = [(tile_sprite(tile.color, border_width), (x-pad, y-pad))
+                               for tile,(x,y) in zip(drawing['tile_list'], topleft_list)]
+        blit_list = self.tile_blits
+        # Keep tile order: sprites overlap by one pixel where tile borders meet
+        if hasattr(surf, 'fblits'): # pygame-ce: faster, returns nothing
+            surf.fblits(blit_list)
+        else:
+            surf.blits(blit_list, doreturn=0)
+    def redraw_all(self) -> None:
+        """Redraw the whole window next frame (not just what moves)."""
+        self.scene = None
+    def scene_key(self, surf:Surface) -> tuple:
+        """Redraw the whole window when this changes."""
+        return (self.game.tileMap.version, self.game.debug, surf.get_size(), self.game.scale)
+    def moving_rects(self) -> list:
+        """Return Rects of the pixels that change every frame (this frame)."""
+        return []
+    def render_ui(self, surf:Surface) -> None:
+        """Draw on top of the drawings (inside the clip)."""
+        pass
+    def render(self) -> None:
+        surf = self.game.osWindow.surf
+        rects = self.moving_rects()
+        # Only the moving things and the HUD change every frame. Redraw the
+        # whole window only if something else changed.
+        scene = self.scene_key(surf)
+        redraw_all = (scene != self.scene)
+        self.scene = scene
+        clip_rects = rects + self.dirty_rects
+        if not redraw_all and clip_rects:
+            # Redraw where things were last frame and where they are now
+            surf.set_clip(clip_rects[0].unionall(clip_rects[1:]))
+        surf.fill(Color.grey)
+        # Look up how to render each drawing
+        renderers = self.renderers
+        for name, drawing in self.game.drawings.items():
+            renderer = renderers.get(name)
+            if renderer: renderer(surf, drawing)
+        self.render_ui(surf)
+        surf.set_clip(None)
+        # DEBUG
+        # Catch programmer error: list drawings I haven't drawn in the HUD
+        if self.game.debug:
+            done_drawings = [name for name in self.game.drawings if name in renderers]
+            todo_drawings = [name for name in self.game.drawings if name not in renderers]
+            self.game.textHud.lines += self.game.textHud.drawings_lines(done_drawings, todo_drawings)
+            rects.append(self.game.textHud.render(surf))
+        if redraw_all:
+            pygame.display.update()
+        else:
+            pygame.display.update(self.dirty_rects + rects)
+        self.dirty_rects = rects
@@ -29,6 +29,45 @@ class TestFRect_attributes(unittest.TestCase):
     def test_bottomleft(self):
         self.assertEqual(self.rect.bottomleft, (9.5,9.5))
 
+class TestFRect_edges(unittest.TestCase):
+    def setUp(self):
+        self.rect = FRect((10,10), (2,1))
+    def test_edges(self):
+        self.assertEqual((self.rect.left, self.rect.right), (9,11))
+        self.assertEqual((self.rect.bottom, self.rect.top), (9.5,10.5))
+    def test_move_updates_edges(self):
+        self.rect.center = (0,0)
+        self.assertEqual((self.rect.left, self.rect.right), (-1,1))
+        self.assertEqual((self.rect.bottom, self.rect.top), (-0.5,0.5))
+    def test_move_updates_centerx_centery(self):
+        self.rect.topleft = (0,0)
+        self.assertEqual((self.rect.centerx, self.rect.centery), (1,-0.5))
+    def test_assign_edge_moves_rect(self):
+        # Assignment to an edge moves the FRect, like pygame.Rect
+        self.rect.left = 0
+        self.assertEqual(self.rect.center, (1,10))
+        self.assertEqual((self.rect.left, self.rect.right), (0,2))
+        self.rect.top = 0
+        self.assertEqual(self.rect.center, (1,-0.5))
+        self.assertEqual(self.rect.corners(), ((0,0), (2,0), (2,-1), (0,-1)))
+        self.rect.right = 0
+        self.rect.bottom = 0
+        self.assertEqual(self.rect.center, (-1,0.5))
+    def test_assign_centerx_centery_moves_rect(self):
+        # Assignment to centerx or centery recenters the FRect, like pygame.Rect
+        self.rect.centerx = 5
+        self.assertEqual(self.rect.center, (5,10))
+        self.assertEqual((self.rect.left, self.rect.right), (4,6))
+        self.rect.centery = 0
+        self.assertEqual(self.rect.center, (5,0))
+        self.assertEqual(self.rect.topleft, (4,0.5))
+    def test_resize_updates_edges(self):
+        # Resize by assignment to FRect.size keeps the center
+        self.rect.size = (4,4)
+        self.assertEqual(self.rect.center, (10,10))
+        self.assertEqual(self.rect.topleft, (8,12))
+        self.assertEqual(self.rect.bottomright, (12,8))
+
 class TestFRect_move_by_assignment(unittest.TestCase):
     def setUp(self):
         self.rect = FRect((10,10), (1,1))
@@ -0,0 +1,202 @@
+#!/usr/bin/env python
+# vim: set fileencoding=utf-8 :
+"""Unit test Tile and TileMap
+
+Run tests
+---------
+- Vim shortcut (from this buffer): ;<Space>
+- Vim shortcut (from any buffer in libs folder): ;mt -- See ./libs/Makefile
+- Vim shortcut (from any buffer in parent folder): ;mt -- See ./Makefile
+- Cmdline (from this folder): python -m unittest
+- Cmdline (from parent folder): python -m unittest discover -s libs
+"""
+
+import os
+import tempfile
+from tile import Tile, TileMap, Physics, BEHAVIORS, encode_tile_map_packed
+from frect import FRect
+from utils import Color
+import unittest
+
+
+class TestTileMap_keys(unittest.TestCase):
+    def setUp(self):
+        self.tileMap = TileMap(game=None)
+        for pos in [(1,-1), (2,-1), (5,-1)]:
+            self.tileMap.add_tile(Tile(pos, Color.light_grey, 'stop'))
+    def test_keys_are_tuples(self):
+        self.assertIn((2,-1), self.tileMap.tile_dict)
+        self.assertNotIn("(2, -1)", self.tileMap.tile_dict)
+    def test_tile_list(self):
+        self.assertEqual([t.pos for t in self.tileMap.tile_list], [(1,-1), (2,-1), (5,-1)])
+    def test_tile_list_is_cached_until_dirty(self):
+        tile_list = self.tileMap.tile_list
+        self.assertIs(self.tileMap.tile_list, tile_list)
+        self.tileMap.remove_tile((1,-1))
+        self.assertEqual([t.pos for t in self.tileMap.tile_list], [(2,-1), (5,-1)])
+
+class TestTile_vertices(unittest.TestCase):
+    def test_vertices_follow_pos(self):
+        tile = Tile((1,-1))
+        self.assertEqual(tile.vertices(), ((0.5,-0.5), (1.5,-0.5), (1.5,-1.5), (0.5,-1.5)))
+        tile.move("right", 0.5)
+        self.assertEqual(tile.vertices(), ((1,-0.5), (2,-0.5), (2,-1.5), (1,-1.5)))
+
+class TestTileMap_spatial_hash(unittest.TestCase):
+    def setUp(self):
+        self.tileMap = TileMap(game=None)
+        for pos in [(0,0), (1,0), (5,0), (-3,-2), (9,9)]:
+            self.tileMap.add_tile(Tile(pos, Color.light_grey, 'stop'))
+    def query(self, center, size):
+        return sorted(t.pos for t in self.tileMap.query_rect(FRect(center, size)))
+    def test_query_rect(self):
+        self.assertEqual(self.query((0,0), (4,4)), [(0,0), (1,0)])
+        self.assertEqual(self.query((0,0), (20,20)), [(-3,-2), (0,0), (1,0), (5,0), (9,9)])
+    def test_query_rect_includes_partly_overlapping_tiles(self):
+        # Rect right edge is at x=4.6: tile (5,0) spans x=4.5 to x=5.5
+        self.assertEqual(self.query((0,0), (9.2,1)), [(0,0), (1,0), (5,0)])
+    def test_query_rect_excludes_touching_tiles(self):
+        # Rect right edge is at x=4.5: tile (5,0) only touches the rect
+        self.assertEqual(self.query((0,0), (9,1)), [(0,0), (1,0)])
+    def test_add_replaces_tile(self):
+        self.tileMap.add_tile(Tile((1,0), Color.white, 'push'))
+        self.assertEqual(len(self.tileMap.tile_dict), 5)
+        [tile] = self.tileMap.query_rect(FRect((1,0), (1,1)))
+        self.assertEqual(tile.behavior, 'push')
+    def test_query_rect_keeps_tile_list_order(self):
+        self.tileMap.add_tile(Tile((0,0), Color.white, 'push')) # Moves (0,0) to the end
+        tiles = self.tileMap.query_rect(FRect((0,0), (20,20)))
+        self.assertEqual(tiles, self.tileMap.tile_list)
+    def test_remove_tile(self):
+        self.assertIsNotNone(self.tileMap.remove_tile((5,0)))
+        self.assertIsNone(self.tileMap.remove_tile((5,0)))
+        self.assertEqual(self.query((0,0), (20,20)), [(-3,-2), (0,0), (1,0), (9,9)])
+
+class TestPhysics_collisions(unittest.TestCase):
+    class Game:
+        movement_amount = 0.5
+    class Player:
+        def __init__(self, pos, size):
+            self.hitbox = FRect(pos, size)
+        @property
+        def pos(self): return self.hitbox.center
+        @pos.setter
+        def pos(self, p): self.hitbox.center = p
+    def setUp(self):
+        self.game = self.Game()
+        self.game.tileMap = TileMap(self.game)
+        self.physics = self.game.physics = Physics(self.game)
+        # Tiles on both sides of the spatial hash cell edge at x=4
+        self.game.tileMap.add_tile(Tile((4,0), Color.light_grey, 'stop'))
+        self.game.tileMap.add_tile(Tile((3,2), Color.white, 'push'))
+    def test_touching_is_not_colliding(self):
+        player = self.Player((3,0), (1,1))
+        self.assertEqual(self.physics.list_colliding_tiles(player), [])
+    def test_stop_tile_in_next_cell(self):
+        player = self.Player((3,0), (1,1))
+        self.physics.move(player, "right")
+        self.assertEqual(player.pos, (3,0))
+    def test_push_tile_into_next_cell(self):
+        player = self.Player((2,2), (1,1))
+        self.physics.move(player, "right")
+        self.assertEqual(player.pos, (2.5,2))
+        self.assertIn((3.5,2), self.game.tileMap.tile_dict)
+        [tile] = self.game.tileMap.query_rect(FRect((4,2), (1,1)))
+        self.assertEqual(tile.pos, (3.5,2))
+
+    def test_stop_tile_blocks_push(self):
+        self.game.tileMap.add_tile(Tile((3,5), Color.light_grey, 'stop'))
+        self.game.tileMap.add_tile(Tile((3,6), Color.white, 'push'))
+        player = self.Player((2,5.5), (1,1)) # Moves into both tiles
+        self.physics.move(player, "right")
+        self.assertEqual(player.pos, (2,5.5))
+        self.assertIn((3,6), self.game.tileMap.tile_dict)
+
+class TestTileMap_save_load(unittest.TestCase):
+    def setUp(self):
+        self.tileMap = TileMap(game=None)
+        for pos,behavior in [((1,-1),'stop'), ((2,-1),'push'), ((3,-2),'pass')]:
+            self.tileMap.add_tile(Tile(pos, Color.white, behavior))
+        fd, self.file = tempfile.mkstemp(suffix=".json")
+        os.close(fd)
+    def tearDown(self):
+        os.remove(self.file)
+    def test_save_then_load(self):
+        self.tileMap.save(self.file)
+        loaded = TileMap(game=None)
+        loaded.load(self.file)
+        self.assertEqual(list(loaded.tile_dict), [(1,-1), (2,-1), (3,-2)])
+        tile = loaded.tile_dict[(2,-1)]
+        self.assertEqual(tile.pos, (2,-1))
+        self.assertEqual(tile.color, Color.white)
+        self.assertEqual(tile.behavior, 'push')
+    def test_save_then_load_packed(self):
+        self.tileMap.add_tile(Tile((4.5,-1), Color.red, 'stop')) # Pushed tiles can be on half-tiles
+        file = self.file[:-len(".json")] + ".tmap"
+        self.addCleanup(os.remove, file)
+        self.tileMap.save(file)
+        loaded = TileMap(game=None)
+        loaded.load(file)
+        self.assertEqual(list(loaded.tile_dict), [(1,-1), (2,-1), (3,-2), (4.5,-1)])
+        self.assertEqual([(t.color, t.behavior) for t in loaded.tile_list],
+                         [(t.color, t.behavior) for t in self.tileMap.tile_list])
+    def test_save_compact_then_load(self):
+        self.tileMap.save(self.file, compact=True)
+        with open(self.file) as f:
+            self.assertNotIn("\n", f.read())
+        loaded = TileMap(game=None)
+        loaded.load(self.file)
+        self.assertEqual([(t.pos, t.color, t.behavior) for t in loaded.tile_list],
+                         [(t.pos, t.color, t.behavior) for t in self.tileMap.tile_list])
+    def test_load_truncated_packed(self):
+        file = self.file[:-len(".json")] + ".tmap"
+        self.addCleanup(os.remove, file)
+        self.tileMap.save(file)
+        with open(file, "rb") as f:
+            data = f.read()
+        for bad_data in (data[:-1], data[:5], data + b"\0"):
+            with open(file, "wb") as f:
+                f.write(bad_data)
+            with self.assertRaises(ValueError):
+                TileMap(game=None).load(file)
+    def test_load_bad_behavior_packed(self):
+        file = self.file[:-len(".json")] + ".tmap"
+        self.addCleanup(os.remove, file)
+        self.tileMap.save(file)
+        with open(file, "rb") as f:
+            data = f.read()
+        with open(file, "wb") as f:
+            f.write(data[:-1] + bytes([len(BEHAVIORS)])) # Last byte is the last tile's behavior
+        with self.assertRaisesRegex(ValueError, "bad behavior"):
+            TileMap(game=None).load(file)
+    def test_save_bad_behavior_packed(self):
+        self.tileMap.add_tile(Tile((4,-1), Color.white, 'slide'))
+        with self.assertRaisesRegex(ValueError, "bad behavior 'slide'"):
+            encode_tile_map_packed(self.tileMap.tile_list)
+    def test_failed_save_keeps_old_packed_file(self):
+        file = self.file[:-len(".json")] + ".tmap"
+        self.addCleanup(os.remove, file)
+        self.tileMap.save(file)
+        self.tileMap.add_tile(Tile((4,-1), Color.white, 'slide'))
+        with self.assertRaises(ValueError):
+            self.tileMap.save(file)
+        loaded = TileMap(game=None)
+        loaded.load(file)
+        self.assertEqual(list(loaded.tile_dict), [(1,-1), (2,-1), (3,-2)])
+    def test_loaded_colors_are_not_the_palette(self):
+        self.tileMap.save(self.file)
+        loaded = TileMap(game=None)
+        loaded.load(self.file)
+        tile = loaded.tile_dict[(1,-1)]
+        self.assertEqual(tile.color, Color.white)
+        self.addCleanup(setattr, tile.color, 'r', 255) # Loaded white tiles share this Color
+        tile.color.r = 0 # Edit in place
+        self.assertEqual(Color.white, (255,255,255,255))
+    def test_json_keys_are_strings(self):
+        import json
+        self.tileMap.save(self.file)
+        with open(self.file) as f:
+            self.assertEqual(list(json.load(f)), ["(1, -1)", "(2, -1)", "(3, -2)"])
+
+if __name__ == '__main__':
+    unittest.main()
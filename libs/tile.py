@@ -3,7 +3,7 @@
 """Tile class and TileMap serdes.
 
 Tiles define their position, color, hitbox, vertices, and artwork. All Tiles
-are squares with side length 'Tile().TILE_WIDTH'. 
+are squares with side length 'Tile.TILE_WIDTH'.
 
 * [ ] Add a Tile() property to define how Tile().art should manipulate the
       Tile vertices. Then do a look-up in Tile().art to create the artwork
@@ -12,8 +12,10 @@ are squares with side length 'Tile().TILE_WIDTH'.
 
 import sys
 import json
+import struct
 import pygame
-if __name__ == '__main__':
+from collections import defaultdict
+if __name__ == '__main__' or not __package__: # Run from libs/ (doctests, unittest)
     from frect import FRect
     from utils import Color
 else:
@@ -22,10 +24,55 @@ else:
 import logging
 logger = logging.getLogger(__name__)
 
+BEHAVIORS = ('stop', 'pass', 'push') # Tile behaviors. Packed files store the index.
+DIRECTIONS = {"up": (0,1), "down": (0,-1), "left": (-1,0), "right": (1,0)} # Unit step for each direction
+
+# One shared pygame.Color per (r,g,b,a), starting with copies of the Color constants. See intern_color()
+_COLORS = {tuple(c): pygame.Color(c) for c in vars(Color).values() if isinstance(c, pygame.Color)}
+
+def intern_color(rgba) -> pygame.Color:
+    """Return the shared pygame.Color for rgba. Loaded tiles of one color share one Color.
+
+    The shared Colors are copies, not the Color constants: changing a
+    loaded tile's color in place does not change the palette.
+
+    >>> intern_color((255,255,255,255)) == Color.white
+    True
+    >>> intern_color((255,255,255,255)) is Color.white
+    False
+    >>> intern_color([1,2,3,4]) is intern_color((1,2,3,4))
+    True
+    """
+    key = tuple(rgba)
+    color = _COLORS.get(key)
+    if color is None:
+        color = _COLORS[key] = pygame.Color(key)
+    return color
+
+def step(pos:tuple, direction:str, amount:float) -> tuple:
+    """Return pos moved by amount in direction. See DIRECTIONS.
+
+    Only the axis of the move changes: the other coordinate is not turned
+    into a float.
+
+    >>> step((3,2), "right", 0.5)
+    (3.5, 2)
+    >>> step((3,2), "down", 0.5)
+    (3, 1.5)
+    """
+    x,y = pos
+    dx,dy = DIRECTIONS[direction]
+    if dx: x += dx*amount
+    if dy: y += dy*amount
+    return (x,y)
+
 
 class Tile:
     """Define a tile in the TileMap. See also TileMap."""
+    __slots__ = ('_hitbox', '_name', 'color', 'behavior')
+
     def __init__(self, pos=(0,0), color=Color.light_grey, behavior='stop') -> None:
+        self._hitbox = FRect(pos, self.size) # See Tile().pos
         self.pos = pos
         self.color = color
         self.behavior = behavior
@@ -35,16 +82,23 @@ class Tile:
         hitbox = self.hitbox
         return (f"Tile(pos={self.pos}, color=Color.{self.color_name}, behavior=\"{self.behavior}\")")
 
-    @property
-    def TILE_WIDTH(self) -> int: return 1 # KEEP THIS AT 1 (@property excludes this from JSON).
+    TILE_WIDTH = 1 # KEEP THIS AT 1
 
     @property
     def name(self) -> str:
-        return str(tuple(self.pos))
+        """Key for this tile in the JSON file: "(x, y)". Cached until the tile moves."""
+        if self._name is None:
+            self._name = str(self.pos)
+        return self._name
+
+    @property
+    def key(self) -> tuple:
+        """Key for this tile in TileMap().tile_dict."""
+        return self.pos # Always a tuple. See Tile().pos
 
     @property
     def color_name(self) -> str:
-        return Color().name(self.color)
+        return Color.name(self.color)
 
     @property
     def size(self) -> tuple:
@@ -54,22 +108,21 @@ class Tile:
     #     self.game.
 
     def move(self, direction:str, movement_amount:float) -> None:
-        m = movement_amount
-        old_pos = self.pos
-        match direction:
-            case "up":
-                self.pos = (self.pos[0], self.pos[1]+m)
-            case "down":
-                self.pos = (self.pos[0], self.pos[1]-m)
-            case "left":
-                self.pos = (self.pos[0]-m, self.pos[1])
-            case "right":
-                self.pos = (self.pos[0]+m, self.pos[1])
+        self.pos = step(self.pos, direction, movement_amount)
+
+    @property
+    def pos(self) -> tuple:
+        return self._hitbox.center
+
+    @pos.setter
+    def pos(self, p:tuple) -> None:
+        """Move the tile by moving its hitbox."""
+        self._hitbox.center = tuple(p) # Use pos as the dict key. See Tile().key
+        self._name = None # See Tile().name
 
     @property
     def hitbox(self) -> FRect:
-        _hitbox = FRect(self.pos, self.size)
-        return _hitbox
+        return self._hitbox
 
     @property
     def art(self) -> list:
@@ -77,26 +130,127 @@ class Tile:
         return self.vertices() # TODO: create tile art based on the vertices
 
     # Private
-    def vertices(self) -> list:
-        """Return the four vertices of the hitbox. See Tile().art"""
-        rect = self.hitbox
-        return [
-                rect.topleft,
-                rect.topright,
-                rect.bottomright,
-                rect.bottomleft,
-                ]
+    def vertices(self) -> tuple:
+        """Return the four vertices of the hitbox. See Tile().art
+
+        Cached until the tile moves. See FRect().corners()
+        """
+        return self._hitbox.corners()
+
+HALF_TILE_WIDTH = Tile.TILE_WIDTH/2 # See TileMap().query_rect()
 
 class TileMap:
-    """Store Tiles in a dict: {"(x, y)": Tile(), }. See also Tile."""
+    """Store Tiles in a dict: {(x, y): Tile(), }. See also Tile.
+
+    Keys are (x, y) tuples, not strings. Keys are only converted to strings
+    ("(x, y)") when saving to JSON.
+
+    Tiles are also stored in a spatial hash: a dict of cells, each cell is a
+    square of CELL_SIZE x CELL_SIZE tiles. Use the spatial hash to find the
+    tiles in an area without checking every tile. See TileMap().query_rect().
+    query_rect() returns tiles in the same order as 'tile_list'.
+
+    Add and remove tiles with add_tile() and remove_tile() to keep the dict
+    and the spatial hash in sync.
+    """
+    CELL_SIZE = 4 # Width of a spatial hash cell (in tiles)
+
     def __init__(self, game) -> None:
         self.game = game
         self.tile_dict = {}
+        self._grid = defaultdict(list) # Spatial hash: {(i, j): [Tile(), ...]}. See TileMap().cell()
+        self._order = {}     # Order tiles were added: {(x, y): n}. Same order as tile_dict.
+        self._num_added = 0  # Next value for '_order'
+        self._tile_list = [] # Cached list of Tiles. See TileMap().tile_list
+        self._dirty = True   # True if tile_dict changed since the caches were built
+        self.version = 0     # Incremented every time tile_dict changes
+        self._visible_key = None  # (version, view) of the cached visible tiles. See TileMap().draw()
+        self._visible_list = []   # Cached list of visible Tiles
+        self._visible_topleft = [] # Cached world space topleft of each visible Tile
+
+    def mark_dirty(self) -> None:
+        """Tell TileMap that 'tile_dict' changed. Call after writing to 'tile_dict'."""
+        self._dirty = True
+        self.version += 1
+
+    def cell(self, pos:tuple) -> tuple:
+        """Return (i, j) of the spatial hash cell that contains World space pos."""
+        return (int(pos[0]//self.CELL_SIZE), int(pos[1]//self.CELL_SIZE))
+
+    def add_tile(self, tile:Tile) -> None:
+        """Add tile to TileMap. Replace the tile that is already at this position."""
+        self.remove_tile(tile.key)
+        self.tile_dict[tile.key] = tile
+        self._grid[self.cell(tile.pos)].append(tile)
+        self._order[tile.key] = self._num_added
+        self._num_added += 1
+        self.mark_dirty()
+
+    def remove_tile(self, key:tuple) -> Tile:
+        """Remove tile at key (x, y). Return the removed tile (None if there is no tile)."""
+        tile = self.tile_dict.pop(key, None)
+        if tile is not None:
+            cell = self.cell(tile.pos)
+            self._grid[cell].remove(tile)
+            if not self._grid[cell]: del self._grid[cell]
+            del self._order[key]
+            self.mark_dirty()
+        return tile
+
+    def clear(self) -> None:
+        """Remove all tiles."""
+        self.tile_dict = {}
+        self._grid.clear()
+        self._order.clear()
+        self.mark_dirty()
+
+    def query_rect(self, rect:FRect) -> list:
+        """Return list of tiles that overlap World space FRect rect.
 
-    def save(self, file:str) -> None:
-        """Save current TileMap to file."""
+        Only check the tiles in the spatial hash cells that overlap rect.
+        """
+        h = HALF_TILE_WIDTH
+        # A tile overlaps rect if the tile center is less than half a tile outside rect
+        left, right, bottom, top = rect.left-h, rect.right+h, rect.bottom-h, rect.top+h
+        i0,j0 = self.cell((left, bottom))
+        i1,j1 = self.cell((right, top))
+        grid = self._grid
+        tiles = []
+        for j in range(j0, j1+1):
+            for i in range(i0, i1+1):
+                if (i,j) not in grid: continue
+                for tile in grid[(i,j)]:
+                    x,y = tile.pos
+                    if (left < x < right) and (bottom < y < top):
+                        tiles.append(tile)
+        if len(tiles) > 1:
+            order = self._order
+            tiles.sort(key=lambda tile: order[tile.key])
+        return tiles
+
+    def save(self, file:str, compact:bool=False) -> None:
+        """Save current TileMap to file.
+
+        Save as JSON, or as packed binary if file ends with '.tmap'. See
+        encode_tile_map_packed().
+
+        JSON is indented to be easy to read and diff. Set compact=True to
+        write it without whitespace (smaller file, faster to write and load).
+        """
+        if file.endswith(".tmap"):
+            # Encode before opening: open() truncates the old file
+            data = encode_tile_map_packed(self.tile_dict.values())
+            with open(file, "wb") as f:
+                f.write(data)
+            logger.info(f"Saved TileMap to \"{file}\"")
+            return
         with open(file, "w") as f:
-            json.dump(self.tile_dict, f, cls=TileMapEncoder, indent=4)
+            # JSON keys must be strings
+            json_dict = {tile.name: tile for tile in self.tile_dict.values()}
+            if compact:
+                json.dump(json_dict, f, cls=TileMapEncoder, separators=(',', ':'))
+            else:
+                json.dump(json_dict, f, cls=TileMapEncoder, indent=4)
         logger.info(f"Saved TileMap to \"{file}\"")
 
     def load(self, file:str) -> None:
@@ -122,10 +276,22 @@ class TileMap:
                 "color": [ 80, 80, 80, 255 ]
             }
         }
+
+        Load packed binary instead if file ends with '.tmap'. Use this to
+        convert a JSON TileMap to a packed TileMap:
+
+        >>> tileMap.load("level1.json"); tileMap.save("level1.tmap") # doctest: +SKIP
         """
-        with open(file) as f:
-            # Use custom deserializer to turn Tile.__dict__ vars back into Tile objects.
-            self.tile_dict = decode_tile_map_json(json.load(f))
+        if file.endswith(".tmap"):
+            with open(file, "rb") as f:
+                tile_dict = decode_tile_map_packed(f.read())
+        else:
+            with open(file) as f:
+                # Use custom deserializer to turn the JSON pos, color, behavior back into Tile objects.
+                tile_dict = decode_tile_map_json(json.load(f))
+        self.clear()
+        for tile in tile_dict.values():
+            self.add_tile(tile)
         logger.info(f"Loaded TileMap from \"{file}\"")
 
     @property
@@ -142,55 +308,61 @@ class TileMap:
             tile.behavior is the tile behavior.
             tile.art is the four vertices of the tile.
 
-        Why not just use the dict directly? TileMap().tile_dict is NOT a
-        dictionary of Tiles. It is a dictionary of tile values ('(x, y)':
-        {'pos': (x, y), 'color': (r, g, b, a)}.
-
-        I was avoiding putting Tiles directly in the 'TileMap().tile_dict' to
-        avoid writing custom serialization when saving levels to file. This
-        was a bad decision.
+        Why not just use the dict directly? TileMap().tile_dict is keyed by
+        position for fast look-up (placing, erasing, pushing tiles). Iterating
+        over it every frame means walking the dict every frame.
 
-        TODO: store Tiles as Tiles in the TileMap().tile_dict. Get rid of the
-        conversion that happens in this function.
+        The list is cached: it is only rebuilt after 'TileMap().mark_dirty()'.
+        A static map costs nothing per frame.
 
         Example
         -------
-        for k in self.tile_dict:
-            logger.info(f"{k}: {self.tile_dict[k]}")
-        (1, 5): {'pos': (1, 5), 'color': (40, 40, 40, 255)}
-        (2, 5): {'pos': (2, 5), 'color': (40, 40, 40, 255)}
-        (3, 5): {'pos': (3, 5), 'color': (40, 40, 40, 255)}
-        (5, 5): {'pos': (5, 5), 'color': (40, 40, 40, 255)}
-        for t in _tile_list:
+        for k,t in self.tile_dict.items():
+            logger.info(f"{k}: {t}")
+        (1, -1): Tile(pos=(1, -1), color=Color.light_grey, behavior="stop")
+        (2, -1): Tile(pos=(2, -1), color=Color.light_grey, behavior="stop")
+        for t in self.tile_list:
             logger.info(f"{t}")
-        Tile(pos=(1, -1), center=(1, -1))
-        Tile(pos=(2, -1), center=(2, -1))
-        Tile(pos=(3, -1), center=(3, -1))
-        Tile(pos=(5, -1), center=(5, -1))
+        Tile(pos=(1, -1), color=Color.light_grey, behavior="stop")
+        Tile(pos=(2, -1), color=Color.light_grey, behavior="stop")
         """
-        if 0:
-            _tile_list = []
-            for k in self.tile_dict:
-                v = self.tile_dict[k]
-                tile = Tile(v['pos'], v['color'])
-                _tile_list.append(tile)
-            return _tile_list
-        else:
-            return list(self.tile_dict.values())
+        if self._dirty:
+            self._tile_list = list(self.tile_dict.values())
+            self._dirty = False
+        return self._tile_list
 
     def draw(self) -> None:
-        """Update Game.drawings['tileMap']."""
-        self.game.drawings['tileMap'] = {}              # Create drawing "tileMap"
-        self.game.drawings['tileMap']['tile_list'] = self.tile_list
+        """Update Game.drawings['tileMap'] with the tiles visible in the OS Window.
 
-    def push_tile(self, old_tile_name:str, direction:str) -> bool:
+        'tile_list' is the list of visible tiles.
+        'tile_topleft' is the world space topleft of each visible tile:
+        'tile_topleft[i]' is the topleft of 'tile_list[i]'. Transform the
+        whole list in one call to 'Xfm().world_to_render_list()' instead of
+        one tile at a time.
+
+        Both lists are cached until the TileMap or the view changes. The
+        drawing is only replaced when they change.
+        """
+        view = self.game.xfm.render_to_world_rect(self.game.osWindow.surf.get_rect())
+        visible_key = (self.version, view.center, view.size)
+        drawings = self.game.drawings
+        if visible_key != self._visible_key or 'tileMap' not in drawings:
+            self._visible_key = visible_key
+            self._visible_list = self.query_rect(view)
+            self._visible_topleft = [tile.art[0] for tile in self._visible_list]
+            drawings['tileMap'] = {                     # Create drawing "tileMap"
+                    'tile_list': self._visible_list,
+                    'tile_topleft': self._visible_topleft,
+                    }
+
+    def push_tile(self, old_tile_key:tuple, direction:str) -> bool:
         """Update tile map when a tile is pushed. Return True if the tile moves."""
-        tile = self.tile_dict[old_tile_name] # Reference to tile in dict (changing tile also changes the tile_dict)
+        # Remove tile from TileMap to avoid colliding with its old position
+        tile = self.remove_tile(old_tile_key)
         old_pos = tile.pos
-        del self.tile_dict[old_tile_name] # Remove tile from dict to avoid colliding with its old position
         # tile.move(direction, self.game.movement_amount) # Move the tile
         self.game.physics.move(tile, direction) # Move the tile
-        self.tile_dict[tile.name] = tile # Use new position as new dict key
+        self.add_tile(tile) # Use new position as new dict key
         return old_pos != tile.pos # Return True if position changed.
 
 class TileMapEncoder(json.JSONEncoder):
@@ -203,22 +375,81 @@ class TileMapEncoder(json.JSONEncoder):
     """
     def default(self, obj):
         if isinstance(obj, Tile):
-            return vars(obj)
+            # Convert color here: one default() call per Tile instead of two
+            c = obj.color
+            return {'pos': obj.pos, 'color': (c.r, c.g, c.b, c.a), 'behavior': obj.behavior}
         elif isinstance(obj, pygame.Color):
-            return tuple(obj)
+            return (obj.r, obj.g, obj.b, obj.a)
         else:
             logger.error(f"Add 'elif' statement to serialize \"{type(obj)}\": {obj}")
             sys.exit()
 
 def decode_tile_map_json(tile_map_json:dict) -> dict:
+    """Convert JSON TileMap to 'TileMap().tile_dict'.
+
+    Ignore the JSON "(x, y)" string keys: key each Tile by its (x, y) pos.
+    """
     tile_dict = {} # Return this
-    for name in tile_map_json:
+    for tile_json in tile_map_json.values():
         # Get pos, color, and behavior from JSON
-        pos = tile_map_json[name]['pos']
+        pos = tuple(tile_json['pos'])
         # Replace every 'color' tuple with type pygame.Color
-        color = pygame.Color(tile_map_json[name]['color'])
-        behavior = tile_map_json[name]['behavior']
-        tile_dict[name] = Tile(pos, color, behavior)
+        color = intern_color(tile_json['color'])
+        behavior = tile_json['behavior']
+        tile = Tile(pos, color, behavior)
+        tile_dict[tile.key] = tile
+    return tile_dict
+
+# Packed TileMap: header, then one fixed-size record per tile
+PACKED_MAGIC = b"TMAP"
+PACKED_VERSION = 1
+_PACKED_HEADER = struct.Struct("<4sBI") # magic, version, number of tiles
+_PACKED_TILE = struct.Struct("<ff4BB")  # x, y (float: tiles can be on half-tiles), r, g, b, a, behavior
+_BEHAVIOR_INDEX = {behavior: i for i, behavior in enumerate(BEHAVIORS)} # Index of each behavior in BEHAVIORS
+
+def encode_tile_map_packed(tiles) -> bytes:
+    """Pack tiles into bytes. See decode_tile_map_packed().
+
+    Each tile is 13 bytes instead of a JSON dict. 'behavior' is stored as
+    its index in BEHAVIORS.
+    """
+    tiles = list(tiles)
+    pack = _PACKED_TILE.pack # Local name for look-up in loop
+    records = []
+    for tile in tiles:
+        behavior = _BEHAVIOR_INDEX.get(tile.behavior)
+        if behavior is None:
+            raise ValueError(f"bad behavior {tile.behavior!r} in {tile!r}: cannot save to .tmap")
+        records.append(pack(*tile.pos, *tile.color, behavior))
+    return _PACKED_HEADER.pack(PACKED_MAGIC, PACKED_VERSION, len(tiles)) + b"".join(records)
+
+def decode_tile_map_packed(data:bytes) -> dict:
+    """Convert packed TileMap bytes to 'TileMap().tile_dict'.
+
+    >>> tiles = [Tile((1,-1), Color.white, 'push'), Tile((2.5,-1), Color.red, 'pass')]
+    >>> decode_tile_map_packed(encode_tile_map_packed(tiles))
+    {(1, -1): Tile(pos=(1, -1), color=Color.white, behavior="push"), (2.5, -1): Tile(pos=(2.5, -1), color=Color.red, behavior="pass")}
+    """
+    start = _PACKED_HEADER.size
+    if len(data) < start:
+        raise ValueError("truncated .tmap")
+    magic, version, n = _PACKED_HEADER.unpack_from(data)
+    if magic != PACKED_MAGIC or version != PACKED_VERSION:
+        raise ValueError(f"Not a packed TileMap (version {PACKED_VERSION})")
+    records = data[start:]
+    # Header says how many tiles: the records must be exactly that long
+    if len(records) < n*_PACKED_TILE.size:
+        raise ValueError("truncated .tmap")
+    if len(records) > n*_PACKED_TILE.size:
+        raise ValueError("extra bytes after the tiles in .tmap")
+    tile_dict = {} # Return this
+    for x,y,r,g,b,a,behavior in _PACKED_TILE.iter_unpack(records):
+        # Whole numbers come back as ints, like they do from JSON
+        pos = (int(x) if x.is_integer() else x, int(y) if y.is_integer() else y)
+        if behavior >= len(BEHAVIORS):
+            raise ValueError(f"bad behavior {behavior} at {pos} in .tmap")
+        tile = Tile(pos, intern_color((r,g,b,a)), BEHAVIORS[behavior])
+        tile_dict[tile.key] = tile
     return tile_dict
 
 # def decode_tile_map_json(tile_dict:dict) -> dict:
@@ -232,10 +463,9 @@ def old_decode_tile_map_json(tile_dict:dict) -> dict:
     Convert to pygame.Color:
         pygame.Color(255,255,255,255)
     """
-    for name in tile_dict:
+    for tile in tile_dict.values():
         # Replace every 'color' tuple with type pygame.Color
-        color = pygame.Color(tile_dict[name]['color'])
-        tile_dict[name]['color'] = color
+        tile['color'] = pygame.Color(tile['color'])
     return tile_dict
 
 class Physics:
@@ -245,36 +475,44 @@ class Physics:
 
     def _is_colliding(self, entity, tile:Tile) -> bool:
         """Return True if entity is colliding with tile."""
-        return ((entity.hitbox.right > tile.hitbox.left) and
-                (entity.hitbox.left < tile.hitbox.right) and
-                (entity.hitbox.top > tile.hitbox.bottom) and
-                (entity.hitbox.bottom < tile.hitbox.top))
+        a = entity.hitbox; b = tile.hitbox
+        return ((a.right > b.left) and
+                (a.left < b.right) and
+                (a.top > b.bottom) and
+                (a.bottom < b.top))
 
     def list_colliding_tiles(self, entity) -> list:
-        """Return list of tiles colliding with entity."""
-        return [tile for tile in self.game.tileMap.tile_list if self._is_colliding(entity, tile)]
+        """Return list of tiles colliding with entity.
+
+        Only check the tiles near the entity. See TileMap().query_rect().
+        Same test as Physics()._is_colliding(), with the entity edges read once.
+        """
+        a = entity.hitbox
+        left, right, bottom, top = a.left, a.right, a.bottom, a.top
+        colliding_tiles = []
+        for tile in self.game.tileMap.query_rect(a):
+            b = tile.hitbox
+            if (right > b.left) and (left < b.right) and (top > b.bottom) and (bottom < b.top):
+                colliding_tiles.append(tile)
+        return colliding_tiles
 
     def move(self, entity, direction:str) -> None:
         m = self.game.movement_amount # Move by half-tiles
         old_pos = entity.pos          # Restore old position if there is a collision
-        match direction:
-            case "up":
-                entity.pos = (entity.pos[0], entity.pos[1]+m)
-            case "down":
-                entity.pos = (entity.pos[0], entity.pos[1]-m)
-            case "left":
-                entity.pos = (entity.pos[0]-m, entity.pos[1])
-            case "right":
-                entity.pos = (entity.pos[0]+m, entity.pos[1])
+        entity.pos = step(old_pos, direction, m)
 
         for tile in self.list_colliding_tiles(entity):
             logger.debug(tile)
             match tile.behavior:
-                case 'stop': entity.pos = old_pos
+                case 'stop':
+                    entity.pos = old_pos
+                    return # Entity is back at old_pos: the other tiles do not matter
                 case 'pass': pass
                 case 'push': 
-                    if self.game.tileMap.push_tile(tile.name, direction): pass
-                    else: entity.pos = old_pos
+                    if self.game.tileMap.push_tile(tile.key, direction): pass
+                    else:
+                        entity.pos = old_pos
+                        return
                 case _:
                     pass
 
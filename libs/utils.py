@@ -6,17 +6,28 @@
 import pygame
 from pygame import Rect, Surface
 from dataclasses import dataclass
+if __name__ == '__main__' or not __package__: # Run from libs/ (doctests, unittest)
+    from frect import FRect
+else:
+    from libs.frect import FRect
 import logging
 # logger = logging.getLogger(__name__) # Uncomment this if I use the logger
 
+LOG_FORMATTER = logging.Formatter(
+        "%(levelname)s in '%(funcName)s()' (%(filename)s:%(lineno)d) -- %(message)s")
+
+_logging_is_setup = False # See setup_logging()
+
 def setup_logging(loglevel:str="DEBUG") -> logging.Logger:
+    """Log to the console. Only add the console handler the first time this is called."""
+    global _logging_is_setup
     logger = logging.getLogger()
+    if _logging_is_setup: return logger
+    _logging_is_setup = True
     logger.setLevel(logging.DEBUG)
-    formatter = logging.Formatter(
-            "%(levelname)s in '%(funcName)s()' (%(filename)s:%(lineno)d) -- %(message)s")
     console_handler = logging.StreamHandler()
     console_handler.setLevel(loglevel)
-    console_handler.setFormatter(formatter)
+    console_handler.setFormatter(LOG_FORMATTER)
     logger.addHandler(console_handler)
     return logger
 
@@ -25,7 +36,6 @@ class OsWindow:
         flags = pygame.RESIZABLE
         self.surf = pygame.display.set_mode(window_size, flags=flags)
 
-# TODO: find a way to make color names and values defined in one place
 @dataclass
 class Color:
     white      = pygame.Color((255,)*3)
@@ -37,33 +47,60 @@ class Color:
     def transparent(self, color:pygame.Color, a:int=100) -> pygame.Color:
         return pygame.Color(color.r, color.g, color.b, a)
 
-    def name(self, color:pygame.Color) -> str:
-        color_tuple = (color.r, color.g, color.b)
-        match color_tuple:
-            case (255,255,255): color_name = 'white'
-            case (40,40,40): color_name = 'grey'
-            case (80,80,80): color_name = 'med_grey'
-            case (120,120,120): color_name = 'light_grey'
-            case (255,0,0): color_name = 'red'
-            case _: color_name = 'unknown'
-        return color_name
+    def border(self, color:pygame.Color) -> pygame.Color:
+        """Return the border color for a tile of this color.
+
+        >>> Color().border(Color.white) == Color.light_grey
+        True
+        """
+        return self.light_grey if color == self.white else self.white
+
+    @staticmethod
+    def name(color:pygame.Color) -> str:
+        """Return the name of the Color constant with this (r,g,b).
+
+        >>> Color.name(pygame.Color(120,120,120))
+        'light_grey'
+        >>> Color.name(pygame.Color(1,2,3))
+        'unknown'
+        """
+        return _COLOR_NAMES.get((color.r, color.g, color.b), 'unknown')
+
+# Color names by (r,g,b), made from the Color constants. See Color.name()
+_COLOR_NAMES = {(c.r, c.g, c.b): name for name, c in vars(Color).items()
+                if isinstance(c, pygame.Color)}
 
 class Text:
     def __init__(self) -> None:
         self.msg = ""
         self.pos = (0, 0)
         self.font = pygame.font.SysFont("RobotoMono", 15)
+        self.line_surfs = {} # Lines rendered last time: {line: Surface}. See Text().render()
 
     def render(self, surf:Surface) -> Rect:
+        """Blit msg onto surf. Return the Rect covered by the text.
+
+        Only render lines that changed since the last call. Font rendering
+        is slow compared to blitting.
+        """
+        return self.render_lines(surf, self.msg.split("\n"))
+
+    def render_lines(self, surf:Surface, lines:list) -> Rect:
+        """Blit each string in lines onto surf. See Text().render()"""
         w=0
-        lines = self.msg.split("\n")
+        line_surfs = {}
+        line_height = self.line_height
         for i,line in enumerate(lines):
-            ### render(text, antialias, color, background=None) -> Surface
-            text_surf = self.font.render(line, True, Color.white)
+            text_surf = self.line_surfs.get(line)
+            if text_surf is None:
+                ### render(text, antialias, color, background=None) -> Surface
+                text_surf = self.font.render(line, True, Color.white)
+            line_surfs[line] = text_surf
             w = max(w, text_surf.get_width())
             ### blit(source, dest, area=None, special_flags=0) -> Rect
-            surf.blit(text_surf, (self.pos[0], self.pos[1] + i*self.line_height))
-        h = self.line_height*len(lines)
+            surf.blit(text_surf, (self.pos[0], self.pos[1] + i*line_height))
+        self.line_surfs = line_surfs # Forget lines that are not shown anymore
+        h = line_height*len(lines)
         return Rect(self.pos, (w,h))
 
     @property
@@ -137,25 +174,78 @@ class Xfm:
     """
     def __init__(self, game) -> None:
         self.game = game
+        self._matrix_key = None # (scale, surf size) of the cached matrix. See Xfm().matrix()
+        self._matrix = None
     def world_to_render(self, p:tuple, surf:Surface=None) -> tuple:
         x,y = p # Point in World coordinates
+        (k,_,e),(_,_,f) = self.matrix(surf) # Scale k and translation vector t_r (e,f)
+        return (int(k*x + e), int(-k*y + f))
+    def matrix(self, surf:Surface=None) -> tuple:
+        """Return the top two rows of C_wr (World to Render) as ((k,0,e),(0,-k,f)).
+
+        The matrix is cached until the scale or the surface size changes.
+
+        >>> class Game: scale = 10
+        >>> Xfm(Game()).matrix(Surface((100,50)))
+        ((10, 0, 50.0), (0, -10, 25.0))
+        """
         k = self.game.scale # Scale from world coords to pixel coords
         if surf:
-            w,h = surf.get_size()
+            size = surf.get_size()
         else:
-            w,h = self.game.osWindow.surf.get_size()
-        e,f = (w/2, h/2) # Translation vector t_r in pixel coords
-        return (int(k*x + e), int(-k*y + f))
+            size = self.game.osWindow.surf.get_size()
+        if (k, size) != self._matrix_key:
+            self._matrix_key = (k, size)
+            w,h = size
+            e,f = (w/2, h/2) # Translation vector t_r in pixel coords
+            self._matrix = ((k, 0, e), (0, -k, f))
+        return self._matrix
+    def world_to_render_list(self, points:list, surf:Surface=None) -> list:
+        """Transform a list of World points to Render points.
+
+        Same math as world_to_render(), but get the xfm matrix once for the
+        whole list instead of once per point.
+
+        >>> class Game: scale = 10
+        >>> Xfm(Game()).world_to_render_list([(0,0), (1,1), (-2,0.5)], Surface((100,50)))
+        [(50, 25), (60, 15), (30, 20)]
+        """
+        (k,_,e),(_,_,f) = self.matrix(surf)
+        return [(int(k*x + e), int(-k*y + f)) for x,y in points]
     def render_to_world(self, p:tuple, surf:Surface=None) -> tuple:
+        """Transform a Render point to World.
+
+        >>> class Game: scale = 10
+        >>> Xfm(Game()).render_to_world((60,15), Surface((100,50)))
+        (1.0, 1.0)
+        """
         x,y = p # Point in Render coordinates
-        k_ = 1/self.game.scale
-        if surf:
-            w,h = surf.get_size()
-        else:
-            w,h = self.game.osWindow.surf.get_size()
-        w,h = self.game.osWindow.surf.get_size()
-        e,f = (w/2, h/2) # Translation vector t_r in pixel coords
+        (k,_,e),(_,_,f) = self.matrix(surf)
+        k_ = 1/k
         return (k_*(x-e), -k_*(y-f))
+    def render_to_world_snapped(self, p:tuple, surf:Surface=None) -> tuple:
+        """Transform a Render point to World and snap it to the nearest tile.
+
+        Same math as render_to_world() and round() in one call. Use this for
+        the mouse position: it runs on every MOUSEMOTION.
+
+        >>> class Game: scale = 10
+        >>> Xfm(Game()).render_to_world_snapped((62,33), Surface((100,50)))
+        (1, -1)
+        """
+        x,y = p # Point in Render coordinates
+        (k,_,e),(_,_,f) = self.matrix(surf)
+        k_ = 1/k
+        return (round(k_*(x-e)), round(-k_*(y-f)))
+    def render_to_world_rect(self, rect:Rect, surf:Surface=None) -> FRect:
+        """Transform a Render space Rect to a World space FRect.
+
+        Example: find the part of World space that is visible in the OS Window
+
+        >>> view = xfm.render_to_world_rect(osWindow.surf.get_rect()) # doctest: +SKIP
+        """
+        k_ = 1/self.game.scale
+        return FRect(self.render_to_world(rect.center, surf), (k_*rect.width, k_*rect.height))
 
 
 
@@ -8,35 +8,53 @@ specifically for pixel space:
 - All values are 'int' (e.g., 1//2 = 0)
 - +y is down (top < bottom)
 
-To work with world space rects, make your own FRect class.
+To work with world space rects, make your own FRect class. See libs/frect.py.
+
+pygame-ce has pygame.FRect: float values, so the (1,1) example below works.
+But +y is still down, so it is not a world space rect either.
 """
 import pygame
 from pygame import Rect
+try:
+    from pygame import FRect # pygame-ce
+except ImportError:
+    FRect = None # pygame: no FRect
 import logging
+from logging.handlers import MemoryHandler
+from operator import attrgetter
+from libs.utils import LOG_FORMATTER
 
 def setup_logging(loglevel:str="DEBUG") -> logging.Logger:
+    """Log to the console. Buffer the records and write them in batches.
+
+    logging.shutdown() flushes the buffer when Python exits. Records are
+    separated by a blank line (print() would not line up with the buffered
+    records).
+    """
     logger = logging.getLogger()
     logger.setLevel(logging.DEBUG)
-    formatter = logging.Formatter(
-            "%(levelname)s in '%(funcName)s()' (%(filename)s:%(lineno)d) -- %(message)s")
     console_handler = logging.StreamHandler()
-    console_handler.setLevel(loglevel)
-    console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
+    console_handler.setFormatter(LOG_FORMATTER)
+    console_handler.terminator = "\n\n"
+    ### MemoryHandler(capacity, flushLevel=ERROR, target=None, flushOnClose=True)
+    buffered_handler = MemoryHandler(1024, target=console_handler)
+    buffered_handler.setLevel(loglevel)
+    logger.addHandler(buffered_handler)
     return logger
 
+SHOW_INT_SIZE_DEMOS = False # True: also run int_size_demos()
+
+# Names of the Rect attributes logged by log_rect_attrs()
+RECT_ATTR_NAMES = (
+    "bottom", "bottomleft", "bottomright", "center", "centerx",
+    "centery", "h", "height", "left", "topleft")
+get_rect_attrs = attrgetter(*RECT_ATTR_NAMES)
+# One line per attribute: logging only formats the message if it is emitted
+RECT_ATTRS_FORMAT = "\n".join(["%s"] + [f"rect.{name}: %s" for name in RECT_ATTR_NAMES])
+
 def log_rect_attrs(rect:Rect) -> None:
-    logger.info(rect)
-    logger.info(f"rect.bottom: {rect.bottom}")
-    logger.info(f"rect.bottomleft: {rect.bottomleft}")
-    logger.info(f"rect.bottomright: {rect.bottomright}")
-    logger.info(f"rect.center: {rect.center}")
-    logger.info(f"rect.centerx: {rect.centerx}")
-    logger.info(f"rect.centery: {rect.centery}")
-    logger.info(f"rect.h: {rect.h}")
-    logger.info(f"rect.height: {rect.height}")
-    logger.info(f"rect.left: {rect.left}")
-    logger.info(f"rect.topleft: {rect.topleft}")
+    """Log rect and its attributes in one message (one line per attribute). See RECT_ATTR_NAMES."""
+    logger.info(RECT_ATTRS_FORMAT, rect, *get_rect_attrs(rect))
 
 
 
@@ -45,7 +63,6 @@ def main() -> None:
 
     # This example does not work because Rect.size is (1,1).
     # <rect(0, 0, 1, 1)> # left, top, width, height
-    print()
     rect = Rect((0,0), (1,1))
     log_rect_attrs(rect)
 
@@ -55,37 +72,42 @@ def main() -> None:
     # Actual:
     #   <rect(0, 0, 1, 1)> # left, top, width, height
     #   (Because 1//2 is 0)
-    print()
     rect.center = rect.topleft
     log_rect_attrs(rect)
 
-    # These examples all work as expected because Rect.size is compatible with
-    # 'int' division.
-    if 0:
-        # Make a Rect to test ways I can move it around.
-        # <rect(0, 0, 2, 4)> # left, top, width, height
-        print()
-        rect = Rect((0,0), (2,4))
+    # Same example with pygame-ce FRect:
+    #   left, top, width, height: -0.5, -0.5, 1, 1
+    if FRect is not None:
+        rect = FRect((0,0), (1,1))
+        rect.center = rect.topleft
         log_rect_attrs(rect)
 
-        # <rect(-1, -2, 2, 4)> # left, top, width, height
-        print()
-        rect = Rect((0,0), (2,4))
-        rect.center = (0,0)
-        log_rect_attrs(rect)
+    if SHOW_INT_SIZE_DEMOS:
+        int_size_demos()
 
-        # <rect(-1, -2, 2, 4)> # left, top, width, height
-        print()
-        rect = Rect((0,0), (2,4))
-        log_rect_attrs(rect.move(
-            rect.left-rect.centerx,
-            rect.top-rect.centery))
+def int_size_demos() -> None:
+    """These examples all work as expected because Rect.size is compatible
+    with 'int' division."""
+    # Make a Rect to test ways I can move it around.
+    # <rect(0, 0, 2, 4)> # left, top, width, height
+    rect = Rect((0,0), (2,4))
+    log_rect_attrs(rect)
 
-        # <rect(-1, -2, 2, 4)> # left, top, width, height
-        print()
-        rect = Rect((0,0), (2,4))
-        rect.center = rect.topleft
-        log_rect_attrs(rect)
+    # <rect(-1, -2, 2, 4)> # left, top, width, height
+    rect = Rect((0,0), (2,4))
+    rect.center = (0,0)
+    log_rect_attrs(rect)
+
+    # <rect(-1, -2, 2, 4)> # left, top, width, height
+    rect = Rect((0,0), (2,4))
+    log_rect_attrs(rect.move(
+        rect.left-rect.centerx,
+        rect.top-rect.centery))
+
+    # <rect(-1, -2, 2, 4)> # left, top, width, height
+    rect = Rect((0,0), (2,4))
+    rect.center = rect.topleft
+    log_rect_attrs(rect)
 
 if __name__ == '__main__':
     logger = setup_logging("INFO")